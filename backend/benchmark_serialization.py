@@ -0,0 +1,81 @@
+import gzip
+import random
+import sys
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from main import dashboard_payload
+from schemas import DashboardResponse, SupplierSummary, MaterialSummary, TransportSummary, CategoryBreakdown
+from serialization import FastJSONResponse, orjson
+
+# Compare dashboard serialization through Pydantic models + response_model against
+# the FastJSONResponse path that encodes plain dicts built from query rows.
+#
+#   python benchmark_serialization.py 50000
+
+def make_rows(supplier_count):
+    random.seed(42)
+    supplier_rows = sorted(
+        ((f"Supplier {i}", random.choice(["Asia", "Europe", "North America"]), random.uniform(10, 50000))
+         for i in range(supplier_count)),
+        key=lambda row: row[2], reverse=True
+    )
+    material_rows = [(name, random.uniform(1000, 90000)) for name in ["Steel", "Aluminum", "Plastic", "Cotton", "Glass"]]
+    transport_rows = [(mode, random.uniform(1000, 90000)) for mode in ["Air Cargo", "Cargo Ship", "Rail Freight"]]
+    total = sum(row[2] for row in supplier_rows)
+    return total, supplier_rows, material_rows, transport_rows
+
+def pydantic_path(total, supplier_rows, material_rows, transport_rows, timestamp):
+    """Previous behaviour: build models, let FastAPI validate against response_model and encode"""
+    pct = lambda value: round((value / total) * 100, 1) if total > 0 else 0
+    materials = [MaterialSummary(name=n, emissions=round(e, 1), percentage=pct(e)) for n, e in material_rows]
+    transport_modes = [TransportSummary(mode=m, emissions=round(e, 1), percentage=pct(e)) for m, e in transport_rows]
+    material_total = sum(m.emissions for m in materials)
+    transport_total = sum(t.emissions for t in transport_modes)
+    response = DashboardResponse(
+        total_emissions=round(total, 1),
+        suppliers=[
+            SupplierSummary(name=n, emissions=round(e, 1), contribution=pct(e), region=r)
+            for n, r, e in supplier_rows
+        ],
+        materials=materials,
+        transport_modes=transport_modes,
+        category_breakdown=[
+            CategoryBreakdown(name="Materials", value=round(material_total, 1), percentage=pct(material_total)),
+            CategoryBreakdown(name="Logistics", value=round(transport_total, 1), percentage=pct(transport_total)),
+            CategoryBreakdown(name="Others", value=round(total * 0.1, 1), percentage=10.0)
+        ],
+        dataset_timestamp=timestamp
+    )
+    validated = DashboardResponse.model_validate(response.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+def fast_path(total, supplier_rows, material_rows, transport_rows, timestamp):
+    return FastJSONResponse(dashboard_payload(total, supplier_rows, material_rows, transport_rows, timestamp)).body
+
+def measure(fn, args, runs):
+    wall, cpu = [], []
+    for _ in range(runs):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        body = fn(*args)
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+    return min(wall) * 1000, min(cpu) * 1000, body
+
+def run_benchmark(supplier_count=50000, runs=5):
+    args = (*make_rows(supplier_count), datetime.utcnow())
+    print(f"Dashboard with {supplier_count} suppliers, best of {runs} "
+          f"(encoder: {'orjson' if orjson is not None else 'json'})")
+    results = {}
+    for label, fn in (("pydantic", pydantic_path), ("fast", fast_path)):
+        wall_ms, cpu_ms, body = measure(fn, args, runs)
+        results[label] = wall_ms
+        print(f"{label:>9}: {wall_ms:8.1f} ms wall | {cpu_ms:8.1f} ms CPU | "
+              f"{len(body) / 1024:8.1f} KiB raw | {len(gzip.compress(body)) / 1024:8.1f} KiB gzip")
+    print(f"  speedup: {results['pydantic'] / results['fast']:.1f}x")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,45 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Measure cold-start latency of a single API worker: module import plus startup handlers.
+# Each run is a fresh interpreter, like a worker spawned by gunicorn.
+#
+#   python init_db.py                # one-time migration for the FAST_START runs
+#   python benchmark_startup.py 10
+
+WORKER_BOOT = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+asyncio.run(main.app.router.startup())
+ready = time.perf_counter()
+print(json.dumps({"import": imported - start, "startup": ready - imported}))
+"""
+
+def boot_worker(fast_start):
+    env = dict(os.environ, FAST_START="true" if fast_start else "false")
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER_BOOT],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run_benchmark(runs=5):
+    for fast_start in (False, True):
+        timings = [boot_worker(fast_start) for _ in range(runs)]
+        import_ms = statistics.median(t["import"] for t in timings) * 1000
+        startup_ms = statistics.median(t["startup"] for t in timings) * 1000
+        label = "FAST_START" if fast_start else "default"
+        print(f"{label:>10}: import {import_ms:7.1f} ms | startup {startup_ms:7.1f} ms | "
+              f"total {import_ms + startup_ms:7.1f} ms (median of {runs})")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
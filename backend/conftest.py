@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import database
+import hotspots
+import main
+
+# test_api.py is a manual smoke script for a running server, not a pytest module
+collect_ignore = ["test_api.py"]
+
+CSV_HEADER = "Date,Supplier,Material,Weight,Distance,TransportMode,Region"
+
+
+def _reset_state():
+    if database._engine is not None:
+        database._engine.dispose()
+    database._engine = None
+    database._factor_cache = None
+    hotspots._aggregates.clear()
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """API client backed by a fresh SQLite database, migrated and seeded at startup"""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'api.db'}?check_same_thread=False")
+    monkeypatch.setenv("FAST_START", "false")
+    _reset_state()
+    with TestClient(main.app) as test_client:
+        yield test_client
+    _reset_state()
+
+
+@pytest.fixture
+def upload(client):
+    """Upload (supplier, material, weight, distance, transport mode, region) rows as a CSV"""
+    def upload_rows(rows, organization_id=None):
+        lines = [CSV_HEADER] + [
+            f"2024-01-15,{supplier},{material},{weight},{distance},{mode},{region}"
+            for supplier, material, weight, distance, mode, region in rows
+        ]
+        headers = {"X-Organization-Id": organization_id} if organization_id else {}
+        response = client.post(
+            "/api/upload",
+            files={"file": ("upload.csv", "\n".join(lines).encode(), "text/csv")},
+            headers=headers
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+    return upload_rows
@@ -1,27 +1,137 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import sessionmaker
-from models import Base
+from models import Base, DEFAULT_ORGANIZATION
 import os
-from dotenv import load_dotenv
+import threading
 
-load_dotenv()
+# Engine is created on first use so importing this module stays cheap for each worker
+_engine = None
+_engine_lock = threading.Lock()
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
-# Database configuration
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./scopezero.db")
+# Emission factors keyed by (category, name), loaded once per process
+_factor_cache = None
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def load_settings():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def fast_start_enabled():
+    """Skip schema creation and seeding at worker boot (run init_db.py once instead)"""
+    load_settings()
+    return os.getenv("FAST_START", "false").lower() in ("1", "true", "yes")
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                load_settings()
+                database_url = os.getenv("DATABASE_URL", "sqlite:///./scopezero.db")
+                _engine = create_engine(database_url)
+                SessionLocal.configure(bind=_engine)
+    return _engine
 
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+def _partitioned_tables():
+    return [table for table in Base.metadata.sorted_tables if "organization_id" in table.columns]
+
+def missing_organization_columns():
+    """Names of tables that still lack the organization_id column"""
+    inspector = inspect(get_engine())
+    return [
+        table.name for table in _partitioned_tables()
+        if "organization_id" not in {column["name"] for column in inspector.get_columns(table.name)}
+    ]
+
+def add_organization_columns():
+    """Partition tables created before multi-tenancy, assigning their rows to the default organization.
+
+    Several workers may run this at once, so an ALTER TABLE or CREATE INDEX that loses
+    the race is ignored as long as the column or index exists afterwards.
+    """
+    engine = get_engine()
+    inspector = inspect(engine)
+    for table in _partitioned_tables():
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        if "organization_id" not in existing:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN organization_id VARCHAR "
+                        f"NOT NULL DEFAULT '{DEFAULT_ORGANIZATION}'"
+                    ))
+            except (OperationalError, ProgrammingError):
+                if table.name in missing_organization_columns():
+                    raise
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except (OperationalError, ProgrammingError):
+                if index.name not in {i["name"] for i in inspect(engine).get_indexes(table.name)}:
+                    raise
+
+def check_organization_columns():
+    """Refuse to serve a database that predates multi-tenancy"""
+    missing = missing_organization_columns()
+    if missing:
+        raise RuntimeError(
+            f"Tables {', '.join(missing)} have no organization_id column; "
+            "run `python init_db.py` to upgrade the database"
+        )
+
+def run_migrations():
+    """Create missing tables and seed emission factors.
+
+    Seeding checks for existing factors before inserting, so concurrent first runs
+    against an empty database can insert duplicates. Run it once from init_db.py
+    before starting workers (or start a single worker without FAST_START).
+    """
+    create_tables()
+    get_engine()
+    db = SessionLocal()
+    try:
+        init_emission_factors(db)
+    finally:
+        db.close()
+
+def get_cached_factors(db):
+    """Return the cached {(category, name): factor} map, loading it on first use"""
+    global _factor_cache
+    if _factor_cache is None:
+        from models import EmissionFactor
+        factors = {(f.category, f.name): f.factor for f in db.query(EmissionFactor).all()}
+        if not factors:
+            return factors  # Not seeded yet, try again on the next call
+        _factor_cache = factors
+    return _factor_cache
+
+def warm_factor_cache():
+    """Load emission factors at startup, refusing to serve if none are seeded"""
+    get_engine()
+    db = SessionLocal()
+    try:
+        loaded = len(get_cached_factors(db))
+    finally:
+        db.close()
+    if not loaded:
+        raise RuntimeError(
+            "No emission factors found in the database; run `python init_db.py` before "
+            "starting workers with FAST_START=true"
+        )
+    return loaded
+
 def init_emission_factors(db):
     from models import EmissionFactor
     
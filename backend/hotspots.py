@@ -0,0 +1,148 @@
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Dataset, SupplyChainRecord, Emission
+
+
+class EmissionAggregates:
+    """Running emission totals per supplier, material and lane.
+
+    Suppliers are keyed by (supplier, region) like the dashboard, lanes by
+    (supplier, region, transport mode). Supplier totals are total emissions,
+    material totals are material emissions and lane totals are transport emissions.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.stamp = None  # (dataset count, latest dataset id) of the organization folded into the totals
+        self.suppliers: Dict[Tuple[str, str], float] = {}
+        self.materials: Dict[str, float] = {}
+        self.lanes: Dict[Tuple[str, str, str], float] = {}
+
+    def add(self, supplier, region, material, transport_mode,
+            material_emission, transport_emission, total_emission):
+        key = (supplier, region)
+        self.suppliers[key] = self.suppliers.get(key, 0) + total_emission
+        self.materials[material] = self.materials.get(material, 0) + material_emission
+        lane = (supplier, region, transport_mode)
+        self.lanes[lane] = self.lanes.get(lane, 0) + transport_emission
+
+    def rebuild(self, db: Session, organization_id: str, stamp):
+        """Regroup the organization's records; `stamp` must have been read before the query"""
+        self.reset()
+        rows = db.query(
+            SupplyChainRecord.supplier,
+            SupplyChainRecord.supplier_region,
+            SupplyChainRecord.material,
+            SupplyChainRecord.transport_mode,
+            func.sum(Emission.material_emission),
+            func.sum(Emission.transport_emission),
+            func.sum(Emission.total_emission)
+        ).join(Emission).filter(
+            SupplyChainRecord.organization_id == organization_id
+        ).group_by(
+            SupplyChainRecord.supplier,
+            SupplyChainRecord.supplier_region,
+            SupplyChainRecord.material,
+            SupplyChainRecord.transport_mode
+        ).all()
+        for row in rows:
+            self.add(*row)
+        # An upload committed while we were grouping may or may not be in `rows`, so only
+        # trust the totals if the organization's datasets did not change underneath us
+        self.stamp = stamp if _dataset_stamp(db, organization_id) == stamp else None
+
+
+# One aggregate per organization, each with its own lock so tenants never wait on each other.
+# Entries are only created for organizations that have uploaded a dataset, so arbitrary
+# X-Organization-Id values cannot grow the registry.
+_aggregates: Dict[str, EmissionAggregates] = {}
+_registry_lock = threading.Lock()
+
+
+def _aggregates_for(organization_id: str) -> EmissionAggregates:
+    with _registry_lock:
+        if organization_id not in _aggregates:
+            _aggregates[organization_id] = EmissionAggregates()
+        return _aggregates[organization_id]
+
+
+def _dataset_stamp(db: Session, organization_id: str, excluding: Optional[int] = None):
+    """Identify the organization's committed datasets by (count, latest id).
+
+    Datasets are committed together with their records and never removed, so the
+    visible set only grows and this pair changes whenever new emissions appear.
+    """
+    query = db.query(func.count(Dataset.id), func.max(Dataset.id)).filter(
+        Dataset.organization_id == organization_id
+    )
+    if excluding is not None:
+        query = query.filter(Dataset.id != excluding)
+    count, latest = query.one()
+    return count, latest
+
+
+def get_aggregates(db: Session, organization_id: str) -> EmissionAggregates:
+    """Return an organization's aggregates, rebuilding them if another process has uploaded data"""
+    stamp = _dataset_stamp(db, organization_id)
+    if stamp[0] == 0:
+        return EmissionAggregates()  # Unknown organization: empty totals, nothing cached
+    aggregates = _aggregates_for(organization_id)
+    with aggregates.lock:
+        if aggregates.stamp != stamp:
+            aggregates.rebuild(db, organization_id, stamp)
+        return aggregates
+
+
+def record_upload(db: Session, organization_id: str, dataset_id: int, rows: List[tuple]):
+    """Fold a committed upload into the aggregates without re-querying every record.
+
+    `rows` holds (supplier, region, material, transport_mode, material_emission,
+    transport_emission, total_emission) tuples. The rows are only applied when the
+    aggregates hold exactly the organization's other datasets; otherwise they are
+    left for the next read to rebuild.
+    """
+    with _registry_lock:
+        aggregates = _aggregates.get(organization_id)
+    if aggregates is None:
+        return  # Nothing cached yet; the first read builds the totals
+    previous = _dataset_stamp(db, organization_id, excluding=dataset_id)
+    with aggregates.lock:
+        if aggregates.stamp != previous:
+            return
+        count, latest = previous
+        for row in rows:
+            aggregates.add(*row)
+        aggregates.stamp = (count + 1, max(latest or 0, dataset_id))
+
+
+def select_top(totals: Dict, k: int, pareto: Optional[float] = None) -> Tuple[List[tuple], float, int]:
+    """Pick the largest entries from `totals` without sorting the whole mapping.
+
+    Entries are popped from a max-heap until `k` have been taken or, when `pareto`
+    is given, until their cumulative share of the total reaches `pareto` percent.
+    Returns the selected (key, emissions) pairs, the dimension total and the
+    number of entries left over.
+    """
+    grand_total = sum(totals.values())
+    if pareto is None:
+        return heapq.nlargest(k, totals.items(), key=lambda item: item[1]), grand_total, max(len(totals) - k, 0)
+
+    heap = [(-value, index, key) for index, (key, value) in enumerate(totals.items())]
+    heapq.heapify(heap)
+    selected = []
+    cumulative = 0.0
+    while heap and len(selected) < k:
+        if grand_total > 0 and cumulative / grand_total * 100 >= pareto:
+            break
+        value, _, key = heapq.heappop(heap)
+        selected.append((key, -value))
+        cumulative -= value
+    return selected, grand_total, len(heap)
@@ -1,6 +1,10 @@
+from database import run_migrations, add_organization_columns
+
 def create_database():
-    """SQLite database will be created automatically"""
-    print("Using SQLite database - will be created automatically")
+    """Create tables, upgrade existing ones and seed emission factors once, outside of API worker boot"""
+    run_migrations()
+    add_organization_columns()
+    print("Database schema and emission factors are ready")
 
 if __name__ == "__main__":
-    create_database()
\ No newline at end of file
+    create_database()
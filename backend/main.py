@@ -1,15 +1,25 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List
+from typing import List, Optional
 import csv
 import io
 from datetime import datetime
 
-from database import get_db, create_tables, init_emission_factors
-from models import Dataset, SupplyChainRecord, EmissionFactor, Emission, Mitigation
-from schemas import *
+from database import (
+    get_db, get_cached_factors, fast_start_enabled, run_migrations, add_organization_columns,
+    check_organization_columns, warm_factor_cache
+)
+from models import Dataset, SupplyChainRecord, EmissionFactor, Emission, Mitigation, DEFAULT_ORGANIZATION
+from schemas import (
+    UploadResponse, DashboardResponse, HotspotItem, HotspotResponse, RecommendationResponse,
+    AuditResponse, RecordResponse
+)
+from serialization import FastJSONResponse
+from hotspots import get_aggregates, record_upload, select_top
 
 app = FastAPI(title="ScopeZero Carbon Intelligence API", version="1.0.0")
 
@@ -22,36 +32,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 @app.on_event("startup")
 def startup_event():
-    create_tables()
-    db = next(get_db())
-    init_emission_factors(db)
+    # With FAST_START the schema and seed data come from init_db.py, run once per deploy
+    if fast_start_enabled():
+        check_organization_columns()
+    else:
+        run_migrations()
+        add_organization_columns()
+    warm_factor_cache()
+
+def get_organization(x_organization_id: Optional[str] = Header(None, max_length=64)) -> str:
+    """Resolve the tenant for a request from the X-Organization-Id header"""
+    return (x_organization_id or "").strip() or DEFAULT_ORGANIZATION
 
 def calculate_emissions(record: SupplyChainRecord, db: Session) -> tuple:
     """Calculate emissions for a record using database emission factors"""
     
-    # Get material emission factor
-    material_factor = db.query(EmissionFactor).filter(
-        EmissionFactor.category == "material",
-        EmissionFactor.name == record.material
-    ).first()
-    
-    if not material_factor:
-        material_factor_value = 1.0  # Default fallback
-    else:
-        material_factor_value = material_factor.factor
-    
-    # Get transport emission factor
-    transport_factor = db.query(EmissionFactor).filter(
-        EmissionFactor.category == "transport",
-        EmissionFactor.name == record.transport_mode
-    ).first()
+    factors = get_cached_factors(db)
     
-    if not transport_factor:
-        transport_factor_value = 0.05  # Default fallback
-    else:
-        transport_factor_value = transport_factor.factor
+    # Get material and transport emission factors, with default fallbacks
+    material_factor_value = factors.get(("material", record.material), 1.0)
+    transport_factor_value = factors.get(("transport", record.transport_mode), 0.05)
     
     # Calculate emissions: (Weight × Material Factor) + (Weight × Distance × Transport Factor)
     material_emission = record.quantity_kg * material_factor_value
@@ -60,23 +65,27 @@ def calculate_emissions(record: SupplyChainRecord, db: Session) -> tuple:
     
     return material_emission, transport_emission, total_emission
 
-def generate_mitigations(db: Session):
-    """Generate rule-based mitigations based on current data"""
+def generate_mitigations(db: Session, organization_id: str):
+    """Generate rule-based mitigations based on an organization's current data"""
     
-    # Clear existing mitigations
-    db.query(Mitigation).delete()
+    # Clear the organization's existing mitigations
+    db.query(Mitigation).filter(Mitigation.organization_id == organization_id).delete()
     
     # Get transport emissions by mode
     transport_emissions = db.query(
         SupplyChainRecord.transport_mode,
         func.sum(Emission.transport_emission).label('total_transport')
-    ).join(Emission).group_by(SupplyChainRecord.transport_mode).all()
+    ).join(Emission).filter(
+        SupplyChainRecord.organization_id == organization_id
+    ).group_by(SupplyChainRecord.transport_mode).all()
     
     # Get material emissions
     material_emissions = db.query(
         SupplyChainRecord.material,
         func.sum(Emission.material_emission).label('total_material')
-    ).join(Emission).group_by(SupplyChainRecord.material).all()
+    ).join(Emission).filter(
+        SupplyChainRecord.organization_id == organization_id
+    ).group_by(SupplyChainRecord.material).all()
     
     mitigations = []
     priority = 1
@@ -85,6 +94,7 @@ def generate_mitigations(db: Session):
     air_emissions = sum(t.total_transport for t in transport_emissions if 'Air' in t.transport_mode)
     if air_emissions > 1000:
         mitigations.append(Mitigation(
+            organization_id=organization_id,
             trigger_reason="High air cargo emissions detected",
             action="Switch from air cargo to ocean freight for non-urgent shipments",
             reduction_absolute=air_emissions * 0.85,
@@ -101,6 +111,7 @@ def generate_mitigations(db: Session):
     steel_emissions = sum(m.total_material for m in material_emissions if m.material == 'Steel')
     if steel_emissions > 2000:
         mitigations.append(Mitigation(
+            organization_id=organization_id,
             trigger_reason="High steel material emissions",
             action="Integrate recycled steel components to reduce primary extraction footprint",
             reduction_absolute=steel_emissions * 0.25,
@@ -117,6 +128,7 @@ def generate_mitigations(db: Session):
     aluminum_emissions = sum(m.total_material for m in material_emissions if m.material == 'Aluminum')
     if aluminum_emissions > 1500:
         mitigations.append(Mitigation(
+            organization_id=organization_id,
             trigger_reason="High aluminum emissions detected",
             action="Source aluminum from suppliers using renewable energy in smelting process",
             reduction_absolute=aluminum_emissions * 0.30,
@@ -135,20 +147,31 @@ def generate_mitigations(db: Session):
     db.commit()
 
 @app.post("/api/upload", response_model=UploadResponse)
-async def upload_dataset(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_dataset(
+    file: UploadFile = File(...),
+    organization_id: str = Depends(get_organization),
+    db: Session = Depends(get_db)
+):
     """Upload and process CSV dataset"""
     
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are supported")
     
-    # Create dataset record
-    dataset = Dataset(filename=file.filename)
+    # Only the file read awaits; parsing, flushing and committing happen on a worker
+    # thread so a large ingest does not block other requests on this event loop
+    content = await file.read()
+    return await run_in_threadpool(ingest_dataset, db, organization_id, file.filename, content)
+
+def ingest_dataset(db: Session, organization_id: str, filename: str, content: bytes) -> UploadResponse:
+    """Store a CSV upload with its emissions, then refresh hotspots and mitigations"""
+    
+    # Create dataset record; it is committed together with its records so readers
+    # never see a dataset whose emissions are still missing
+    dataset = Dataset(organization_id=organization_id, filename=filename)
     db.add(dataset)
-    db.commit()
-    db.refresh(dataset)
+    db.flush()  # Get the ID
     
-    # Read and parse CSV
-    content = await file.read()
+    # Parse CSV
     csv_text = content.decode('utf-8')
     csv_reader = csv.DictReader(io.StringIO(csv_text))
     
@@ -180,6 +203,7 @@ async def upload_dataset(file: UploadFile = File(...), db: Session = Depends(get
     records_processed = 0
     suppliers = set()
     materials = set()
+    aggregate_rows = []
     
     # Reset CSV reader
     csv_reader = csv.DictReader(io.StringIO(csv_text))
@@ -203,6 +227,7 @@ async def upload_dataset(file: UploadFile = File(...), db: Session = Depends(get
             
             # Create record
             record = SupplyChainRecord(
+                organization_id=organization_id,
                 dataset_id=dataset.id,
                 invoice_id=f"INV-{records_processed + 1}",
                 supplier=supplier,
@@ -222,6 +247,7 @@ async def upload_dataset(file: UploadFile = File(...), db: Session = Depends(get
             
             # Create emission record
             emission = Emission(
+                organization_id=organization_id,
                 record_id=record.id,
                 material_emission=material_emission,
                 transport_emission=transport_emission,
@@ -232,6 +258,8 @@ async def upload_dataset(file: UploadFile = File(...), db: Session = Depends(get
             
             suppliers.add(supplier)
             materials.add(material)
+            aggregate_rows.append((supplier, region, material, transport_mode,
+                                   material_emission, transport_emission, total_emission))
             records_processed += 1
             
         except Exception as e:
@@ -239,8 +267,11 @@ async def upload_dataset(file: UploadFile = File(...), db: Session = Depends(get
     
     db.commit()
     
+    # Keep hotspot aggregates current without a full regroup
+    record_upload(db, organization_id, dataset.id, aggregate_rows)
+    
     # Generate mitigations based on new data
-    generate_mitigations(db)
+    generate_mitigations(db, organization_id)
     
     return UploadResponse(
         message="Dataset uploaded successfully",
@@ -250,104 +281,195 @@ async def upload_dataset(file: UploadFile = File(...), db: Session = Depends(get
         materials_detected=len(materials)
     )
 
+def percentage_of(value, total):
+    return round((value / total) * 100, 1) if total > 0 else 0.0
+
+def dashboard_payload(total_emissions, supplier_rows, material_rows, transport_rows, dataset_timestamp):
+    """Build the dashboard JSON body straight from (name, ..., emissions) query rows"""
+    
+    suppliers = [
+        {
+            "name": name,
+            "emissions": round(emissions, 1),
+            "contribution": percentage_of(emissions, total_emissions),
+            "region": region
+        } for name, region, emissions in supplier_rows
+    ]
+    
+    materials = [
+        {
+            "name": name,
+            "emissions": round(emissions, 1),
+            "percentage": percentage_of(emissions, total_emissions)
+        } for name, emissions in material_rows
+    ]
+    
+    transport_modes = [
+        {
+            "mode": mode,
+            "emissions": round(emissions, 1),
+            "percentage": percentage_of(emissions, total_emissions)
+        } for mode, emissions in transport_rows
+    ]
+    
+    # Category breakdown
+    material_total = sum((m["emissions"] for m in materials), 0.0)
+    transport_total = sum((t["emissions"] for t in transport_modes), 0.0)
+    other_total = total_emissions * 0.1  # Assume 10% other
+    
+    category_breakdown = [
+        {
+            "name": "Materials",
+            "value": round(material_total, 1),
+            "percentage": percentage_of(material_total, total_emissions)
+        },
+        {
+            "name": "Logistics",
+            "value": round(transport_total, 1),
+            "percentage": percentage_of(transport_total, total_emissions)
+        },
+        {
+            "name": "Others",
+            "value": round(other_total, 1),
+            "percentage": 10.0
+        }
+    ]
+    
+    return {
+        "total_emissions": round(total_emissions, 1),
+        "suppliers": suppliers,
+        "materials": materials,
+        "transport_modes": transport_modes,
+        "category_breakdown": category_breakdown,
+        "dataset_timestamp": dataset_timestamp
+    }
+
 @app.get("/api/dashboard", response_model=DashboardResponse)
-def get_dashboard(db: Session = Depends(get_db)):
+def get_dashboard(organization_id: str = Depends(get_organization), db: Session = Depends(get_db)):
     """Get dashboard analytics"""
     
     # Total emissions
-    total_emissions = db.query(func.sum(Emission.total_emission)).scalar() or 0
+    total_emissions = db.query(func.sum(Emission.total_emission)).filter(
+        Emission.organization_id == organization_id
+    ).scalar() or 0.0
     
     # Supplier breakdown
-    supplier_data = db.query(
+    supplier_rows = db.query(
         SupplyChainRecord.supplier,
         SupplyChainRecord.supplier_region,
         func.sum(Emission.total_emission).label('emissions')
-    ).join(Emission).group_by(
+    ).join(Emission).filter(
+        SupplyChainRecord.organization_id == organization_id
+    ).group_by(
         SupplyChainRecord.supplier, 
         SupplyChainRecord.supplier_region
     ).order_by(func.sum(Emission.total_emission).desc()).all()
     
-    suppliers = [
-        SupplierSummary(
-            name=s.supplier,
-            emissions=round(s.emissions, 1),
-            contribution=round((s.emissions / total_emissions) * 100, 1) if total_emissions > 0 else 0,
-            region=s.supplier_region
-        ) for s in supplier_data
-    ]
-    
     # Material breakdown
-    material_data = db.query(
+    material_rows = db.query(
         SupplyChainRecord.material,
         func.sum(Emission.material_emission).label('emissions')
-    ).join(Emission).group_by(SupplyChainRecord.material).order_by(
+    ).join(Emission).filter(
+        SupplyChainRecord.organization_id == organization_id
+    ).group_by(SupplyChainRecord.material).order_by(
         func.sum(Emission.material_emission).desc()
     ).all()
     
-    materials = [
-        MaterialSummary(
-            name=m.material,
-            emissions=round(m.emissions, 1),
-            percentage=round((m.emissions / total_emissions) * 100, 1) if total_emissions > 0 else 0
-        ) for m in material_data
-    ]
-    
     # Transport breakdown
-    transport_data = db.query(
+    transport_rows = db.query(
         SupplyChainRecord.transport_mode,
         func.sum(Emission.transport_emission).label('emissions')
-    ).join(Emission).group_by(SupplyChainRecord.transport_mode).order_by(
+    ).join(Emission).filter(
+        SupplyChainRecord.organization_id == organization_id
+    ).group_by(SupplyChainRecord.transport_mode).order_by(
         func.sum(Emission.transport_emission).desc()
     ).all()
     
-    transport_modes = [
-        TransportSummary(
-            mode=t.transport_mode,
-            emissions=round(t.emissions, 1),
-            percentage=round((t.emissions / total_emissions) * 100, 1) if total_emissions > 0 else 0
-        ) for t in transport_data
-    ]
+    # Latest dataset timestamp
+    dataset_timestamp = db.query(func.max(Dataset.upload_timestamp)).filter(
+        Dataset.organization_id == organization_id
+    ).scalar()
     
-    # Category breakdown
-    material_total = sum(m.emissions for m in materials)
-    transport_total = sum(t.emissions for t in transport_modes)
-    other_total = total_emissions * 0.1  # Assume 10% other
+    return FastJSONResponse(dashboard_payload(
+        total_emissions, supplier_rows, material_rows, transport_rows, dataset_timestamp
+    ))
+
+def build_hotspots(totals, k, pareto, include_others, describe):
+    """Turn one aggregate dimension into ranked hotspot items plus an optional remainder bucket"""
+    
+    selected, dimension_total, remaining = select_top(totals, k, pareto)
+    
+    items = []
+    cumulative = 0.0
+    for key, emissions in selected:
+        contribution = (emissions / dimension_total) * 100 if dimension_total > 0 else 0
+        cumulative += contribution
+        items.append(HotspotItem(
+            emissions=round(emissions, 1),
+            contribution=round(contribution, 1),
+            cumulative_contribution=round(cumulative, 1),
+            **describe(key)
+        ))
     
-    category_breakdown = [
-        CategoryBreakdown(
-            name="Materials",
-            value=round(material_total, 1),
-            percentage=round((material_total / total_emissions) * 100, 1) if total_emissions > 0 else 0
-        ),
-        CategoryBreakdown(
-            name="Logistics",
-            value=round(transport_total, 1),
-            percentage=round((transport_total / total_emissions) * 100, 1) if total_emissions > 0 else 0
-        ),
-        CategoryBreakdown(
-            name="Others",
-            value=round(other_total, 1),
-            percentage=10.0
+    others = None
+    if include_others and remaining > 0:
+        others_total = dimension_total - sum(emissions for _, emissions in selected)
+        others = HotspotItem(
+            name=f"Others ({remaining})",
+            emissions=round(others_total, 1),
+            contribution=round((others_total / dimension_total) * 100, 1) if dimension_total > 0 else 0,
+            cumulative_contribution=100.0
         )
-    ]
     
-    # Latest dataset timestamp
-    latest_dataset = db.query(Dataset).order_by(Dataset.upload_timestamp.desc()).first()
+    return items, others, dimension_total
+
+@app.get("/api/hotspots", response_model=HotspotResponse)
+def get_hotspots(
+    k: int = Query(10, ge=1, le=1000),
+    pareto: Optional[float] = Query(None, gt=0, le=100),
+    include_others: bool = True,
+    organization_id: str = Depends(get_organization),
+    db: Session = Depends(get_db)
+):
+    """Get top-K supplier, material and lane hotspots with optional Pareto cut-off"""
+    
+    aggregates = get_aggregates(db, organization_id)
+    
+    # Hold the organization's lock so a concurrent upload cannot change the totals mid-read
+    with aggregates.lock:
+        suppliers, suppliers_others, suppliers_total = build_hotspots(
+            aggregates.suppliers, k, pareto, include_others,
+            lambda supplier: {"name": supplier[0], "region": supplier[1]}
+        )
+        materials, materials_others, materials_total = build_hotspots(
+            aggregates.materials, k, pareto, include_others,
+            lambda name: {"name": name}
+        )
+        lanes, lanes_others, lanes_total = build_hotspots(
+            aggregates.lanes, k, pareto, include_others,
+            lambda lane: {"name": f"{lane[0]} / {lane[2]}", "region": lane[1], "transport_mode": lane[2]}
+        )
     
-    return DashboardResponse(
-        total_emissions=round(total_emissions, 1),
+    return HotspotResponse(
+        total_emissions=round(suppliers_total, 1),
+        suppliers_total_emissions=round(suppliers_total, 1),
+        materials_total_emissions=round(materials_total, 1),
+        lanes_total_emissions=round(lanes_total, 1),
         suppliers=suppliers,
         materials=materials,
-        transport_modes=transport_modes,
-        category_breakdown=category_breakdown,
-        dataset_timestamp=latest_dataset.upload_timestamp if latest_dataset else None
+        lanes=lanes,
+        suppliers_others=suppliers_others,
+        materials_others=materials_others,
+        lanes_others=lanes_others
     )
 
 @app.get("/api/recommendations", response_model=List[RecommendationResponse])
-def get_recommendations(db: Session = Depends(get_db)):
+def get_recommendations(organization_id: str = Depends(get_organization), db: Session = Depends(get_db)):
     """Get mitigation recommendations"""
     
-    mitigations = db.query(Mitigation).order_by(Mitigation.priority_rank).all()
+    mitigations = db.query(Mitigation).filter(
+        Mitigation.organization_id == organization_id
+    ).order_by(Mitigation.priority_rank).all()
     
     return [
         RecommendationResponse(
@@ -364,24 +486,28 @@ def get_recommendations(db: Session = Depends(get_db)):
     ]
 
 @app.get("/api/audit", response_model=AuditResponse)
-def get_audit_info(db: Session = Depends(get_db)):
+def get_audit_info(organization_id: str = Depends(get_organization), db: Session = Depends(get_db)):
     """Get audit and verification information"""
     
-    total_records = db.query(SupplyChainRecord).count()
-    datasets_count = db.query(Dataset).count()
+    total_records = db.query(SupplyChainRecord).filter(SupplyChainRecord.organization_id == organization_id).count()
+    datasets_count = db.query(Dataset).filter(Dataset.organization_id == organization_id).count()
     
     # Calculate data quality scores
-    records_with_emissions = db.query(Emission).count()
+    records_with_emissions = db.query(Emission).filter(Emission.organization_id == organization_id).count()
     completeness_score = (records_with_emissions / total_records * 100) if total_records > 0 else 0
     
     # Factor coverage
-    unique_materials = db.query(SupplyChainRecord.material).distinct().count()
+    unique_materials = db.query(SupplyChainRecord.material).filter(
+        SupplyChainRecord.organization_id == organization_id
+    ).distinct().count()
     materials_with_factors = db.query(EmissionFactor).filter(EmissionFactor.category == "material").count()
     factor_coverage = min(100, (materials_with_factors / unique_materials * 100)) if unique_materials > 0 else 100
     
     data_quality_score = (completeness_score + factor_coverage) / 2
     
-    latest_dataset = db.query(Dataset).order_by(Dataset.upload_timestamp.desc()).first()
+    latest_dataset = db.query(Dataset).filter(
+        Dataset.organization_id == organization_id
+    ).order_by(Dataset.upload_timestamp.desc()).first()
     
     return AuditResponse(
         total_records=total_records,
@@ -393,22 +519,36 @@ def get_audit_info(db: Session = Depends(get_db)):
     )
 
 @app.get("/api/records", response_model=List[RecordResponse])
-def get_records(limit: int = 100, db: Session = Depends(get_db)):
+def get_records(
+    limit: int = 100,
+    organization_id: str = Depends(get_organization),
+    db: Session = Depends(get_db)
+):
     """Get supply chain records with emissions"""
     
-    records = db.query(SupplyChainRecord).join(Emission).limit(limit).all()
-    
-    return [
-        RecordResponse(
-            id=r.id,
-            supplier=r.supplier,
-            material=r.material,
-            quantity_kg=r.quantity_kg,
-            transport_mode=r.transport_mode,
-            distance_km=r.distance_km or 0,
-            total_emission=round(r.emissions.total_emission, 1)
-        ) for r in records
-    ]
+    rows = db.query(
+        SupplyChainRecord.id,
+        SupplyChainRecord.supplier,
+        SupplyChainRecord.material,
+        SupplyChainRecord.quantity_kg,
+        SupplyChainRecord.transport_mode,
+        SupplyChainRecord.distance_km,
+        Emission.total_emission
+    ).join(Emission).filter(
+        SupplyChainRecord.organization_id == organization_id
+    ).limit(limit).all()
+    
+    return FastJSONResponse([
+        {
+            "id": record_id,
+            "supplier": supplier,
+            "material": material,
+            "quantity_kg": quantity_kg,
+            "transport_mode": transport_mode,
+            "distance_km": distance_km or 0.0,
+            "total_emission": round(total_emission, 1)
+        } for record_id, supplier, material, quantity_kg, transport_mode, distance_km, total_emission in rows
+    ])
 
 @app.get("/api/emission-factors")
 def get_emission_factors(db: Session = Depends(get_db)):
@@ -1,14 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 Base = declarative_base()
 
+# Organization used when a request does not name one (and for rows created before partitioning)
+DEFAULT_ORGANIZATION = "default"
+
 class Dataset(Base):
     __tablename__ = "datasets"
     
     id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(String, nullable=False, default=DEFAULT_ORGANIZATION, index=True)
     filename = Column(String, nullable=False)
     upload_timestamp = Column(DateTime, default=datetime.utcnow)
     
@@ -16,8 +20,14 @@ class Dataset(Base):
 
 class SupplyChainRecord(Base):
     __tablename__ = "supply_chain_records"
+    __table_args__ = (
+        Index("ix_supply_chain_records_org_supplier", "organization_id", "supplier"),
+        Index("ix_supply_chain_records_org_material", "organization_id", "material"),
+        Index("ix_supply_chain_records_org_transport_mode", "organization_id", "transport_mode"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(String, nullable=False, default=DEFAULT_ORGANIZATION, index=True)
     dataset_id = Column(Integer, ForeignKey("datasets.id"))
     invoice_id = Column(String)
     supplier = Column(String, nullable=False)
@@ -48,6 +58,7 @@ class Emission(Base):
     __tablename__ = "emissions"
     
     id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(String, nullable=False, default=DEFAULT_ORGANIZATION, index=True)
     record_id = Column(Integer, ForeignKey("supply_chain_records.id"))
     material_emission = Column(Float, nullable=False)
     transport_emission = Column(Float, nullable=False)
@@ -57,8 +68,12 @@ class Emission(Base):
 
 class Mitigation(Base):
     __tablename__ = "mitigations"
+    __table_args__ = (
+        Index("ix_mitigations_org_priority_rank", "organization_id", "priority_rank"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(String, nullable=False, default=DEFAULT_ORGANIZATION, index=True)
     trigger_reason = Column(String, nullable=False)
     action = Column(Text, nullable=False)
     reduction_absolute = Column(Float, nullable=False)
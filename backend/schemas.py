@@ -41,8 +41,8 @@ class SupplierSummary(BaseModel):
 
 class MaterialSummary(BaseModel):
     name: str
-    percentage: float
     emissions: float
+    percentage: float
 
 class TransportSummary(BaseModel):
     mode: str
@@ -86,4 +86,26 @@ class UploadResponse(BaseModel):
     dataset_id: int
     records_processed: int
     suppliers_detected: int
-    materials_detected: int
\ No newline at end of file
+    materials_detected: int
+
+class HotspotItem(BaseModel):
+    name: str
+    emissions: float
+    contribution: float
+    cumulative_contribution: float
+    region: Optional[str] = None
+    transport_mode: Optional[str] = None
+
+class HotspotResponse(BaseModel):
+    # Each item's contribution is relative to its own dimension's total: suppliers to
+    # total emissions, materials to material emissions, lanes to transport emissions
+    total_emissions: float
+    suppliers_total_emissions: float
+    materials_total_emissions: float
+    lanes_total_emissions: float
+    suppliers: List[HotspotItem]
+    materials: List[HotspotItem]
+    lanes: List[HotspotItem]
+    suppliers_others: Optional[HotspotItem]
+    materials_others: Optional[HotspotItem]
+    lanes_others: Optional[HotspotItem]
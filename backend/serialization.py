@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode plain dicts/lists/tuples to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), default=_default, allow_nan=False).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response for payloads already built from query rows.
+
+    Returning this from an endpoint skips response_model validation, so the
+    payload must already match the declared schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -57,7 +57,19 @@ def test_backend():
     else:
         print(f" Dashboard failed: {response.status_code}")
     
-    # Test 5: Get recommendations
+    # Test 5: Get hotspots
+    print("\n Testing hotspots...")
+    response = requests.get(f"{BASE_URL}/hotspots", params={"k": 2, "pareto": 80})
+    if response.status_code == 200:
+        hotspots = response.json()
+        print(f" Top suppliers: {[s['name'] for s in hotspots['suppliers']]}")
+        print(f"   Top lanes: {[l['name'] for l in hotspots['lanes']]}")
+        if hotspots['suppliers_others']:
+            print(f"   {hotspots['suppliers_others']['name']}: {hotspots['suppliers_others']['emissions']} kg CO2e")
+    else:
+        print(f" Hotspots failed: {response.status_code}")
+    
+    # Test 6: Get recommendations
     print("\n Testing recommendations...")
     response = requests.get(f"{BASE_URL}/recommendations")
     if response.status_code == 200:
@@ -68,7 +80,7 @@ def test_backend():
     else:
         print(f" Recommendations failed: {response.status_code}")
     
-    # Test 6: Get audit info
+    # Test 7: Get audit info
     print("\n Testing audit information...")
     response = requests.get(f"{BASE_URL}/audit")
     if response.status_code == 200:
@@ -80,6 +92,14 @@ def test_backend():
     else:
         print(f" Audit failed: {response.status_code}")
     
+    # Test 8: Organization isolation
+    print("\n Testing organization isolation...")
+    response = requests.get(f"{BASE_URL}/dashboard", headers={"X-Organization-Id": "isolation-check"})
+    if response.status_code == 200 and not response.json()['suppliers']:
+        print(" Empty organization sees no other organization's suppliers")
+    else:
+        print(f" Organization isolation failed: {response.status_code}")
+    
     print("\n Backend testing completed!")
     print("\nNext steps:")
     print("1. Update your React frontend to use these API endpoints")
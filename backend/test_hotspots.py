@@ -0,0 +1,236 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import hotspots
+from hotspots import get_aggregates, record_upload, select_top
+from models import Base, Dataset, SupplyChainRecord, Emission
+
+ORG = "acme"
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    # File-backed so two sessions really are separate connections with their own transactions
+    engine = create_engine(f"sqlite:///{tmp_path / 'hotspots.db'}")
+    Base.metadata.create_all(bind=engine)
+    hotspots._aggregates.clear()
+    yield sessionmaker(bind=engine, autoflush=False)
+    hotspots._aggregates.clear()
+    engine.dispose()
+
+
+def stage_upload(db, rows, organization_id=ORG):
+    """Add a dataset and its records the way upload_dataset does, without committing"""
+    dataset = Dataset(organization_id=organization_id, filename="upload.csv")
+    db.add(dataset)
+    db.flush()
+    aggregate_rows = []
+    for supplier, material, mode, material_emission, transport_emission in rows:
+        record = SupplyChainRecord(
+            organization_id=organization_id, dataset_id=dataset.id, supplier=supplier,
+            supplier_region="EU", material=material, quantity_kg=1, transport_mode=mode
+        )
+        db.add(record)
+        db.flush()
+        total = material_emission + transport_emission
+        db.add(Emission(
+            organization_id=organization_id, record_id=record.id, material_emission=material_emission,
+            transport_emission=transport_emission, total_emission=total
+        ))
+        aggregate_rows.append((supplier, "EU", material, mode, material_emission, transport_emission, total))
+    return dataset.id, aggregate_rows
+
+
+def read_totals(Session, organization_id=ORG):
+    db = Session()
+    try:
+        aggregates = get_aggregates(db, organization_id)
+        return dict(aggregates.suppliers), dict(aggregates.materials), dict(aggregates.lanes)
+    finally:
+        db.close()
+
+
+def test_select_top_pareto_stops_exactly_at_threshold():
+    selected, total, remaining = select_top({"a": 50.0, "b": 30.0, "c": 20.0}, k=10, pareto=80)
+    assert selected == [("a", 50.0), ("b", 30.0)]
+    assert total == 100.0
+    assert remaining == 1
+
+
+def test_select_top_k_larger_than_entries():
+    totals = {"a": 1.0, "b": 3.0, "c": 2.0}
+    assert select_top(totals, k=10) == ([("b", 3.0), ("c", 2.0), ("a", 1.0)], 6.0, 0)
+    assert select_top(totals, k=10, pareto=100) == ([("b", 3.0), ("c", 2.0), ("a", 1.0)], 6.0, 0)
+
+
+def test_select_top_all_zero_totals():
+    totals = {"a": 0.0, "b": 0.0, "c": 0.0}
+    selected, total, remaining = select_top(totals, k=2, pareto=80)
+    assert [key for key, _ in selected] == ["a", "b"]
+    assert total == 0
+    assert remaining == 1
+    assert select_top(totals, k=2) == ([("a", 0.0), ("b", 0.0)], 0, 1)
+
+
+def test_record_upload_applies_rows_to_current_aggregates(sessions):
+    writer = sessions()
+    stage_upload(writer, [("S1", "Steel", "Air Cargo", 10.0, 5.0)])
+    writer.commit()
+    assert read_totals(sessions)[0] == {("S1", "EU"): 15.0}
+
+    dataset_id, rows = stage_upload(writer, [("S1", "Steel", "Rail Freight", 10.0, 1.0)])
+    writer.commit()
+    record_upload(writer, ORG, dataset_id, rows)
+    writer.close()
+
+    assert hotspots._aggregates[ORG].stamp == (2, dataset_id)
+    assert read_totals(sessions) == (
+        {("S1", "EU"): 26.0}, {"Steel": 20.0}, {("S1", "EU", "Air Cargo"): 5.0, ("S1", "EU", "Rail Freight"): 1.0}
+    )
+
+
+def test_read_during_uncommitted_upload_does_not_go_stale(sessions):
+    writer = sessions()
+    dataset_id, _ = stage_upload(writer, [("S1", "Steel", "Air Cargo", 10.0, 5.0)])
+    writer.commit()
+    writer.close()
+    assert read_totals(sessions)[0] == {("S1", "EU"): 15.0}
+
+    # A hotspot read lands while the second upload is flushed but not yet committed
+    writer = sessions()
+    dataset_id, rows = stage_upload(writer, [("S2", "Aluminum", "Cargo Ship", 40.0, 2.0)])
+    assert read_totals(sessions)[0] == {("S1", "EU"): 15.0}
+    writer.commit()
+    record_upload(writer, ORG, dataset_id, rows)
+    writer.close()
+
+    assert read_totals(sessions)[0] == {("S1", "EU"): 15.0, ("S2", "EU"): 42.0}
+
+
+def test_interleaved_uploads_fall_back_to_rebuild(sessions):
+    writer = sessions()
+    stage_upload(writer, [("S0", "Glass", "Air Cargo", 1.0, 0.0)])
+    writer.commit()
+    writer.close()
+    assert read_totals(sessions)[0] == {("S0", "EU"): 1.0}
+
+    first, second = sessions(), sessions()
+    first_id, first_rows = stage_upload(first, [("S1", "Steel", "Air Cargo", 10.0, 5.0)])
+    first.commit()
+    second_id, second_rows = stage_upload(second, [("S2", "Steel", "Rail Freight", 20.0, 1.0)])
+    second.commit()
+
+    # The first upload's rows no longer describe the whole difference, so they are skipped
+    record_upload(first, ORG, first_id, first_rows)
+    assert hotspots._aggregates[ORG].stamp[0] == 1
+    record_upload(second, ORG, second_id, second_rows)
+    first.close()
+    second.close()
+
+    suppliers, materials, lanes = read_totals(sessions)
+    assert suppliers == {("S0", "EU"): 1.0, ("S1", "EU"): 15.0, ("S2", "EU"): 21.0}
+    assert materials == {"Glass": 1.0, "Steel": 30.0}
+    assert lanes == {("S0", "EU", "Air Cargo"): 0.0, ("S1", "EU", "Air Cargo"): 5.0, ("S2", "EU", "Rail Freight"): 1.0}
+
+
+def test_organizations_are_aggregated_separately(sessions):
+    writer = sessions()
+    stage_upload(writer, [("S1", "Steel", "Air Cargo", 10.0, 5.0)], organization_id="acme")
+    stage_upload(writer, [("S9", "Glass", "Air Cargo", 1.0, 1.0)], organization_id="globex")
+    writer.commit()
+    writer.close()
+
+    assert read_totals(sessions, "acme")[0] == {("S1", "EU"): 15.0}
+    assert read_totals(sessions, "globex")[0] == {("S9", "EU"): 2.0}
+
+
+def test_unknown_organizations_are_not_cached(sessions):
+    for index in range(5):
+        assert read_totals(sessions, f"probe-{index}") == ({}, {}, {})
+    writer = sessions()
+    dataset_id, rows = stage_upload(writer, [("S1", "Steel", "Air Cargo", 10.0, 5.0)], organization_id="new")
+    writer.commit()
+    record_upload(writer, "new", dataset_id, rows)
+    writer.close()
+    assert hotspots._aggregates == {}
+    assert read_totals(sessions, "new")[0] == {("S1", "EU"): 15.0}
+    assert list(hotspots._aggregates) == ["new"]
+
+
+# Unknown materials and modes use the fallback factors 1.0 and 0.05, so with a 20 km
+# distance every row emits its weight as material and again as transport emissions
+HOTSPOT_ROWS = [
+    ("A", "Ore", 500, 20, "Barge", "EU"),
+    ("B", "Resin", 300, 20, "Barge", "EU"),
+    ("C", "Resin", 150, 20, "Barge", "EU"),
+    ("D", "Resin", 50, 20, "Barge", "EU"),
+]
+
+
+def test_hotspots_top_k_with_others_bucket(client, upload):
+    upload(HOTSPOT_ROWS)
+    body = client.get("/api/hotspots", params={"k": 2}).json()
+
+    assert body["total_emissions"] == 2000.0
+    assert [(s["name"], s["region"], s["emissions"]) for s in body["suppliers"]] == [
+        ("A", "EU", 1000.0), ("B", "EU", 600.0)
+    ]
+    assert [s["contribution"] for s in body["suppliers"]] == [50.0, 30.0]
+    assert [s["cumulative_contribution"] for s in body["suppliers"]] == [50.0, 80.0]
+    assert body["suppliers_others"] == {
+        "name": "Others (2)", "emissions": 400.0, "contribution": 20.0,
+        "cumulative_contribution": 100.0, "region": None, "transport_mode": None
+    }
+
+
+def test_hotspots_pareto_cut_off(client, upload):
+    upload(HOTSPOT_ROWS)
+    body = client.get("/api/hotspots", params={"k": 10, "pareto": 80}).json()
+
+    assert [s["name"] for s in body["suppliers"]] == ["A", "B"]
+    assert body["suppliers_others"]["name"] == "Others (2)"
+    assert body["suppliers"][-1]["cumulative_contribution"] == 80.0
+
+
+def test_hotspots_without_others_bucket(client, upload):
+    upload(HOTSPOT_ROWS)
+    body = client.get("/api/hotspots", params={"k": 1, "include_others": "false"}).json()
+
+    assert len(body["suppliers"]) == 1
+    assert body["suppliers_others"] is None
+    assert body["materials_others"] is None
+    assert body["lanes_others"] is None
+
+
+def test_hotspots_material_and_lane_bases(client, upload):
+    upload(HOTSPOT_ROWS)
+    body = client.get("/api/hotspots").json()
+
+    assert body["materials_total_emissions"] == 1000.0
+    assert [(m["name"], m["contribution"]) for m in body["materials"]] == [("Ore", 50.0), ("Resin", 50.0)]
+    assert body["lanes_total_emissions"] == 1000.0
+    assert body["lanes"][0] == {
+        "name": "A / Barge", "emissions": 500.0, "contribution": 50.0,
+        "cumulative_contribution": 50.0, "region": "EU", "transport_mode": "Barge"
+    }
+
+
+def test_hotspots_key_suppliers_by_region(client, upload):
+    upload([("A", "Ore", 500, 20, "Barge", "EU"), ("A", "Ore", 100, 20, "Barge", "US")])
+    suppliers = client.get("/api/hotspots").json()["suppliers"]
+
+    assert [(s["name"], s["region"], s["emissions"]) for s in suppliers] == [("A", "EU", 1000.0), ("A", "US", 200.0)]
+
+
+def test_hotspots_empty_organization(client):
+    body = client.get("/api/hotspots", headers={"X-Organization-Id": "empty"}).json()
+
+    assert body["total_emissions"] == 0
+    assert body["suppliers"] == body["materials"] == body["lanes"] == []
+    assert body["suppliers_others"] is None
+
+
+@pytest.mark.parametrize("params", [{"k": 0}, {"k": 1001}, {"pareto": 0}, {"pareto": 101}])
+def test_hotspots_reject_invalid_parameters(client, params):
+    assert client.get("/api/hotspots", params=params).status_code == 422
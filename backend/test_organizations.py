@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+def test_upload_is_processed_off_the_event_loop(client, upload, monkeypatch):
+    ingest = main.ingest_dataset
+
+    def ingest_without_loop(*args):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return ingest(*args)
+
+    monkeypatch.setattr(main, "ingest_dataset", ingest_without_loop)
+    assert upload([("A", "Steel", 100, 10, "Air Cargo", "EU")])["records_processed"] == 1
+
+
+ACME_ROWS = [
+    ("Acme Air", "Other", 100, 100, "Air Cargo", "EU"),   # 6000 kg air transport -> air cargo mitigation
+    ("Acme Steel", "Steel", 2000, 0, "Barge", "EU"),      # 3700 kg steel -> steel mitigation
+]
+GLOBEX_ROWS = [
+    ("Globex Metals", "Aluminum", 200, 0, "Barge", "US"),  # 2500 kg aluminum -> aluminum mitigation
+]
+
+
+def get(client, path, organization_id):
+    response = client.get(path, headers={"X-Organization-Id": organization_id})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+def two_organizations(client, upload):
+    upload(ACME_ROWS, organization_id="acme")
+    upload(GLOBEX_ROWS, organization_id="globex")
+    return client
+
+
+def test_dashboard_is_scoped_by_organization(two_organizations):
+    acme = get(two_organizations, "/api/dashboard", "acme")
+    globex = get(two_organizations, "/api/dashboard", "globex")
+
+    assert {s["name"] for s in acme["suppliers"]} == {"Acme Air", "Acme Steel"}
+    assert acme["total_emissions"] == 9800.0
+    assert [s["name"] for s in globex["suppliers"]] == ["Globex Metals"]
+    assert globex["total_emissions"] == 2500.0
+
+
+def test_records_and_audit_are_scoped_by_organization(two_organizations):
+    assert {r["supplier"] for r in get(two_organizations, "/api/records", "acme")} == {"Acme Air", "Acme Steel"}
+    assert [r["supplier"] for r in get(two_organizations, "/api/records", "globex")] == ["Globex Metals"]
+
+    acme_audit = get(two_organizations, "/api/audit", "acme")
+    globex_audit = get(two_organizations, "/api/audit", "globex")
+    assert (acme_audit["total_records"], acme_audit["datasets_count"]) == (2, 1)
+    assert (globex_audit["total_records"], globex_audit["datasets_count"]) == (1, 1)
+
+
+def test_recommendations_are_scoped_by_organization(two_organizations):
+    acme = [r["description"] for r in get(two_organizations, "/api/recommendations", "acme")]
+    globex = [r["description"] for r in get(two_organizations, "/api/recommendations", "globex")]
+
+    assert len(acme) == 2
+    assert any("air cargo" in action for action in acme)
+    assert any("recycled steel" in action for action in acme)
+    assert len(globex) == 1
+    assert "aluminum" in globex[0].lower()
+
+
+def test_upload_only_regenerates_its_own_mitigations(two_organizations, upload):
+    acme_before = get(two_organizations, "/api/recommendations", "acme")
+
+    upload([("Globex Air", "Other", 100, 100, "Air Cargo", "US")], organization_id="globex")
+
+    assert get(two_organizations, "/api/recommendations", "acme") == acme_before
+    assert len(get(two_organizations, "/api/recommendations", "globex")) == 2
+
+
+def test_requests_without_header_use_default_organization(two_organizations):
+    response = two_organizations.get("/api/dashboard")
+
+    assert response.json()["suppliers"] == []
+    assert two_organizations.get("/api/records").json() == []
+    assert two_organizations.get("/api/recommendations").json() == []
+    assert two_organizations.get("/api/audit").json()["total_records"] == 0
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from benchmark_serialization import fast_path, make_rows, pydantic_path
+from schemas import DashboardResponse, RecordResponse
+
+
+def pydantic_body(model, content):
+    """Bytes FastAPI would have produced by validating `content` against `model`"""
+    return JSONResponse(model.model_validate(content).model_dump(mode="json")).body
+
+
+@pytest.mark.parametrize("supplier_count", [0, 250])
+def test_dashboard_payload_matches_pydantic_path(supplier_count):
+    total, supplier_rows, material_rows, transport_rows = make_rows(supplier_count)
+    if not supplier_count:
+        total, material_rows, transport_rows = 0.0, [], []
+    args = (total, supplier_rows, material_rows, transport_rows, datetime(2024, 1, 15, 8, 30))
+
+    assert fast_path(*args) == pydantic_path(*args)
+
+
+def test_dashboard_endpoint_matches_schema(client, upload):
+    upload([("A", "Steel", 1000, 250, "Air Cargo", "EU"), ("B", "Ore", 20, 0, "Barge", "US")])
+    response = client.get("/api/dashboard")
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == pydantic_body(DashboardResponse, response.json())
+
+
+def test_empty_dashboard_matches_schema(client):
+    response = client.get("/api/dashboard", headers={"X-Organization-Id": "empty"})
+
+    assert response.json()["total_emissions"] == 0.0
+    assert b'"total_emissions":0.0' in response.content
+    assert response.content == pydantic_body(DashboardResponse, response.json())
+
+
+def test_records_endpoint_matches_schema(client, upload):
+    upload([("A", "Steel", 1000, 250, "Air Cargo", "EU"), ("B", "Ore", 20, 0, "Barge", "US")])
+    response = client.get("/api/records")
+    records = response.json()
+
+    assert len(records) == 2
+    expected = JSONResponse([RecordResponse.model_validate(r).model_dump(mode="json") for r in records]).body
+    assert response.content == expected
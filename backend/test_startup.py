@@ -0,0 +1,78 @@
+import os
+import shutil
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+
+import database
+import main
+
+
+@pytest.fixture
+def fast_start_database(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'startup.db'}?check_same_thread=False")
+    monkeypatch.setenv("FAST_START", "true")
+    database._engine = None
+    database._factor_cache = None
+    yield
+    database._engine.dispose()
+    database._engine = None
+    database._factor_cache = None
+
+
+def test_fast_start_refuses_unseeded_database(fast_start_database):
+    database.create_tables()
+    with pytest.raises(RuntimeError, match="init_db.py"):
+        with TestClient(main.app):
+            pass
+
+
+def test_fast_start_after_init_db(fast_start_database):
+    database.run_migrations()
+    with TestClient(main.app) as client:
+        assert client.get("/api/dashboard").status_code == 200
+    assert len(database._factor_cache) == 16
+
+
+@pytest.fixture
+def legacy_database(tmp_path, monkeypatch):
+    """Copy of the committed scopezero.db, created before organization_id existed"""
+    path = tmp_path / "legacy.db"
+    shutil.copy(os.path.join(os.path.dirname(__file__), "scopezero.db"), path)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}?check_same_thread=False")
+    database._engine = None
+    database._factor_cache = None
+    yield monkeypatch
+    database._engine.dispose()
+    database._engine = None
+    database._factor_cache = None
+
+
+def test_boot_upgrades_legacy_database(legacy_database):
+    legacy_database.setenv("FAST_START", "false")
+    assert database.missing_organization_columns()
+    with TestClient(main.app) as client:
+        for path in ("/api/dashboard", "/api/hotspots", "/api/records", "/api/audit"):
+            assert client.get(path).status_code == 200
+    assert database.missing_organization_columns() == []
+
+
+def test_fast_start_refuses_legacy_database(legacy_database):
+    legacy_database.setenv("FAST_START", "true")
+    with pytest.raises(RuntimeError, match="init_db.py"):
+        with TestClient(main.app):
+            pass
+
+
+def test_organization_migration_tolerates_losing_the_race(legacy_database, monkeypatch):
+    # Inspect the schema before another worker adds the columns, then migrate on the stale view
+    stale = inspect(database.get_engine())
+    for table in database._partitioned_tables():
+        stale.get_columns(table.name)
+    database.add_organization_columns()
+
+    views = iter([stale])
+    monkeypatch.setattr(database, "inspect", lambda engine: next(views, None) or inspect(engine))
+    database.add_organization_columns()
+    assert database.missing_organization_columns() == []